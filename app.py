@@ -8,10 +8,16 @@ import json
 import io
 import math
 import altair as alt
+import numpy as np
 import pandas as pd
 import streamlit as st
 from datetime import datetime
 
+# Copy-on-Write is always on from pandas 3 (where the option is deprecated); opt in on older versions
+PANDAS_MAJOR = int(pd.__version__.split(".")[0])
+if PANDAS_MAJOR < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 st.set_page_config(page_title="Procurement Dashboard – AM/NS", layout="wide")
 
 # -----------------------------
@@ -75,13 +81,23 @@ with st.sidebar.expander("Settings", expanded=False):
 # -----------------------------
 # File upload + Excel parsing
 # -----------------------------
+def open_workbook(src):
+    """Open an Excel workbook with calamine (Rust) and fall back to openpyxl if it is unavailable."""
+    try:
+        return pd.ExcelFile(src, engine="calamine")
+    except (ImportError, ValueError):
+        # python-calamine not installed, or pandas < 2.2 without the calamine engine
+        if hasattr(src, "seek"):
+            src.seek(0)
+        return pd.ExcelFile(src, engine="openpyxl")
+
 @st.cache_data(show_spinner=False)
-def read_excel(uploaded_file, date_format="auto"):
-    """Read Excel with sheets PRs, POs, optional Category_Mapping"""
-    if uploaded_file is None:
+def read_excel(file_bytes, date_format="auto"):
+    """Read Excel with sheets PRs, POs, optional Category_Mapping (cached on the upload's bytes)"""
+    if file_bytes is None:
         return None, None, None
     try:
-        xls = pd.ExcelFile(uploaded_file, engine="openpyxl")
+        xls = open_workbook(io.BytesIO(file_bytes))
         prs = pd.read_excel(xls, sheet_name="PRs") if "PRs" in xls.sheet_names else None
         pos = pd.read_excel(xls, sheet_name="POs") if "POs" in xls.sheet_names else None
         cmap = pd.read_excel(xls, sheet_name="Category_Mapping") if "Category_Mapping" in xls.sheet_names else None
@@ -95,6 +111,16 @@ def read_excel(uploaded_file, date_format="auto"):
         st.error(f"Failed to read Excel: {e}")
         return None, None, None
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def to_xlsx_bytes(df, sheet):
+    """Serialize a frame to .xlsx bytes (xlsxwriter); cached so reruns don't re-serialize.
+
+    Bounded: each filter combination yields new (large) payloads, so only the latest few are kept."""
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False, sheet_name=sheet)
+    return buf.getvalue()
+
 # -----------------------------
 # Column Mapper UI
 # -----------------------------
@@ -131,71 +157,102 @@ def column_mapper(df, sheet_name, required_fields, optional_fields):
 # -----------------------------
 CATEGORIES = ["MRO", "Services", "Capex", "PCM"]
 
-def derive_category(row, mapping, cfg_mapping):
-    # 1) explicit Category column (if mapped)
-    cat_col = mapping.get("Category")
-    if cat_col and cat_col != "— not mapped —":
-        val = str(row.get(cat_col, "")).strip()
-        if val in CATEGORIES:
-            return val
+def vectorized_category(df, mapping, cfg_mapping):
+    """Derive Category column-wise: explicit Category → key-field mapping → None."""
+    s = pd.Series(pd.NA, index=df.index, dtype="object")
+    # 1) explicit Category column (unify() has already renamed a mapped one)
+    if "Category" in df.columns:
+        cat = df["Category"].astype("string").str.strip()
+        s = s.fillna(cat.where(cat.isin(CATEGORIES)))
     # 2) mapping sheet via key fields (Material_Group/Cost_Center/Item_Type)
     for key_field in ["Material_Group", "Cost_Center", "Item_Type"]:
         col = mapping.get(key_field)
-        if col and col != "— not mapped —":
-            key_val = str(row.get(col, "")).strip()
-            if key_val in cfg_mapping:
-                mapped_cat = cfg_mapping[key_val]
-                if mapped_cat in CATEGORIES:
-                    return mapped_cat
-    # 3) fallback: Unknown → assign None (flag in Data Health)
-    return None
-
-# -----------------------------
-# Helper: Big KPI cards
-# -----------------------------
-def big_number_card(title, value, color="#2F80ED", subtext=None, icon=None):
-    """Render a large KPI card with big number and optional subtext/icon."""
-    if value is None:
-        value = 0
-    value_fmt = f"{value:,}" if isinstance(value, (int, float)) else str(value)
-    icon_html = f"<span style='font-size:22px;margin-right:8px'>{icon}</span>" if icon else ""
-    sub_html = f"<div style='font-size:13px;color:#6c757d;margin-top:6px'>{subtext}</div>" if subtext else ""
-    st.markdown(f"""
-    <div style='background:{color}15;border:1px solid {color}30;border-radius:14px;padding:16px 18px'>
-      <div style='font-size:14px;color:#3a3a3a;font-weight:600'>{icon_html}{title}</div>
-      <div style='font-size:36px;font-weight:700;color:{color};line-height:1;margin-top:6px'>{value_fmt}</div>
-      {sub_html}
-    </div>
-    """, unsafe_allow_html=True)
+        if col and col != "— not mapped —" and key_field in df.columns:
+            mapped = df[key_field].astype("string").str.strip().map(cfg_mapping)
+            s = s.fillna(mapped.where(mapped.isin(CATEGORIES)))
+    # 3) fallback: Unknown → stays NA (flag in Data Health)
+    return s
 
 # -----------------------------
 # Compute KPIs and filtered data
 # -----------------------------
-@st.cache_data(show_spinner=False)
-def compute_metrics(prs_df, pos_df, pr_map, po_map, cfg):
+CAT_COLS = ["PR_Status", "PO_Status", "Delivery_Status", "Vendor", "Buyer", "Category", "Material_Group", "Cost_Center", "Item_Type"]
+TABLE_PAGE_ROWS = 5000  # rows sent to the browser grid; exports always carry the full filtered frame
+HELPER_COLS = ["_PR_Number_norm"]
+
+def _str_col(df, col):
+    """Column as a string Series with missing values (or a missing column) as ''."""
+    if col not in df.columns:
+        return pd.Series("", index=df.index, dtype="string")
+    return df[col].astype("string").fillna("")
+
+def _status_col(df, col):
+    """Categorical status column (original case); all-missing when the column is absent."""
+    if col not in df.columns:
+        return pd.Series(pd.Categorical([None] * len(df)), index=df.index)
+    return df[col]
+
+def _level_hits(status, values):
+    """Per-level flags: lower-cased category level in values (O(unique levels), not O(rows))."""
+    return pd.Index(status.cat.categories).astype(str).str.lower().isin([str(v).lower() for v in values])
+
+def _codes_lookup(flags, codes):
+    """Per-row flags from per-level flags, indexed by category codes; missing (code -1) → False."""
+    return np.append(flags, False)[codes]
+
+def _status_in(status, values):
+    """Case-insensitive status.isin(values) for a categorical, looked up through its codes."""
+    hits = _codes_lookup(_level_hits(status, values), status.cat.codes.to_numpy())
+    return pd.Series(hits, index=status.index)
+
+NUMBA_MIN_ROWS = 1_000_000  # below this the one-off JIT compile costs more than it saves
+
+@st.cache_resource(show_spinner=False)
+def _open_delivery_kernel():
+    """Numba JIT kernel, imported and built only when needed (once per process); None if numba is not installed (optional)."""
+    try:
+        from numba import njit, prange
+    except ImportError:
+        return None
+
+    @njit(parallel=True)
+    def kernel(qty, grn, status_codes, open_codes, out):
+        for i in prange(qty.shape[0]):
+            c = status_codes[i]
+            out[i] = (qty[i] - grn[i]) > 0 or (c >= 0 and open_codes[c])
+    return kernel
+
+def open_delivery_mask(qty, grn, status_codes, open_codes):
+    """Outstanding qty (NaN → not outstanding) OR an open delivery status, from category codes."""
+    kernel = _open_delivery_kernel() if qty.shape[0] >= NUMBA_MIN_ROWS else None
+    if kernel is not None:
+        out = np.empty(qty.shape[0], dtype=np.bool_)
+        kernel(qty, grn, status_codes, open_codes, out)
+        return out
+    return ((qty - grn) > 0) | _codes_lookup(open_codes, status_codes)
+
+def parse_dates(col, dayfirst):
+    """Vectorized date parse; warns when non-empty cells could not be parsed (they become NaT)."""
+    # pandas >= 2 infers one format from the first value unless told the column is mixed
+    kwargs = {"format": "mixed"} if PANDAS_MAJOR >= 2 else {}
+    parsed = pd.to_datetime(col, errors="coerce", dayfirst=dayfirst, cache=True, **kwargs)
+    lost = int((parsed.isna() & col.notna()).sum())
+    if lost:
+        st.warning(f"{lost:,} value(s) in '{col.name}' could not be parsed as dates and are excluded by date filters.")
+    return parsed
+
+def enrich_frames(prs_df, pos_df, pr_map, po_map, cfg):
+    """Unify column names, parse dates and derive Category plus the open flags."""
     if prs_df is None and pos_df is None:
-        return {}, pd.DataFrame(), pd.DataFrame()
-
-    # Copy for safe operations
-    prs = prs_df.copy() if prs_df is not None else pd.DataFrame()
-    pos = pos_df.copy() if pos_df is not None else pd.DataFrame()
-
-    # Parse dates according to setting
-    def parse_date(s):
-        if pd.isna(s):
-            return pd.NaT
-        if cfg.get("date_format") == "dd-mm-yyyy":
-            try:
-                return pd.to_datetime(s, dayfirst=True, errors='coerce')
-            except:
-                return pd.to_datetime(s, errors='coerce')
-        elif cfg.get("date_format") == "yyyy-mm-dd":
-            try:
-                return pd.to_datetime(s, errors='coerce')
-            except:
-                return pd.to_datetime(s, errors='coerce')
-        else:
-            return pd.to_datetime(s, errors='coerce', dayfirst=True)
+        return pd.DataFrame(), pd.DataFrame()
+
+    # No defensive copies: unify() renames into new frames and, under Copy-on-Write,
+    # the column assignments below never write through to the (cached) inputs
+    prs = prs_df if prs_df is not None else pd.DataFrame()
+    pos = pos_df if pos_df is not None else pd.DataFrame()
+
+    # Parse dates according to setting (only yyyy-mm-dd turns day-first off)
+    _dayfirst = cfg.get("date_format") != "yyyy-mm-dd"
 
     # Rename mapped fields to unified names
     def unify(df, mapping, required, optional):
@@ -203,57 +260,70 @@ def compute_metrics(prs_df, pos_df, pr_map, po_map, cfg):
             return df
         m = {mapping[k]: k for k in (required + optional) if mapping.get(k) and mapping[k] != "— not mapped —"}
         df = df.rename(columns=m)
+        # Low-cardinality enumerations → category dtype (integer codes for groupby/isin/unique);
+        # status comparisons lower-case only the category levels, so source values keep their case
+        for c in CAT_COLS:
+            if c in df.columns:
+                df[c] = df[c].astype("category")
         # Dates
         if "PR_Date" in df.columns:
-            df["PR_Date"] = df["PR_Date"].apply(parse_date)
+            df["PR_Date"] = parse_dates(df["PR_Date"], _dayfirst)
         if "PO_Date" in df.columns:
-            df["PO_Date"] = df["PO_Date"].apply(parse_date)
+            df["PO_Date"] = parse_dates(df["PO_Date"], _dayfirst)
         return df
 
     prs = unify(prs, pr_map, REQUIRED_PRS_FIELDS, OPTIONAL_PRS_FIELDS)
     pos = unify(pos, po_map, REQUIRED_POS_FIELDS, OPTIONAL_POS_FIELDS)
 
+    # Normalized PR key, built once for the PR→PO link check
+    if not prs.empty:
+        prs["_PR_Number_norm"] = _str_col(prs, "PR_Number").str.strip()
+
     # Derive Category where missing
-    cfg_map = config.get("category_mapping", {})
-    if "Category" not in prs.columns and not prs.empty:
-        prs["Category"] = prs.apply(lambda r: derive_category(r, pr_map, cfg_map), axis=1)
-    if "Category" not in pos.columns and not pos.empty:
-        pos["Category"] = pos.apply(lambda r: derive_category(r, po_map, cfg_map), axis=1)
+    cfg_map = cfg.get("category_mapping", {})
+    if not prs.empty:
+        prs["Category"] = pd.Categorical(vectorized_category(prs, pr_map, cfg_map), categories=CATEGORIES)
+    if not pos.empty:
+        pos["Category"] = pd.Categorical(vectorized_category(pos, po_map, cfg_map), categories=CATEGORIES)
 
     # Link PR→PO via PR_Number if available
-    linked_prs = set()
-    if "PR_Number" in pos.columns:
-        linked_vals = pos["PR_Number"].dropna().astype(str).str.strip()
-        linked_prs = set(linked_vals)
+    # (isin hashes the linked values once; no Python set/Index is materialized)
+    linked_series = pos["PR_Number"].dropna().astype("string").str.strip() if "PR_Number" in pos.columns else pd.Series([], dtype="string")
 
     # Open PR logic
-    pr_open_statuses = [s.lower() for s in config.get("pr_open_statuses", [])]
-    def is_pr_open(row):
-        status = str(row.get("PR_Status", "")).lower()
-        pr_no = str(row.get("PR_Number", "")).strip()
-        linked = pr_no in linked_prs
-        return (status != "closed") or (not linked) or (status in pr_open_statuses)
-
-    prs["Is_Open_PR"] = prs.apply(is_pr_open, axis=1)
+    pr_open_statuses = [s.lower() for s in cfg.get("pr_open_statuses", [])]
+    if not prs.empty:
+        status = _status_col(prs, "PR_Status")
+        linked = prs["_PR_Number_norm"].isin(linked_series)
+        prs["Is_Open_PR"] = ~_status_in(status, ["closed"]) | (~linked) | _status_in(status, pr_open_statuses)
 
     # Open Delivery PO logic
-    po_open_statuses = [s.lower() for s in config.get("po_open_delivery_statuses", [])]
-    def is_po_open_delivery(row):
-        status = str(row.get("Delivery_Status", "")).lower()
-        qty = row.get("PO_Quantity") if "PO_Quantity" in row else None
-        grn = row.get("GRN_Quantity") if "GRN_Quantity" in row else None
-        outstanding = False
-        try:
-            if pd.notna(qty) and pd.notna(grn):
-                outstanding = (float(qty) - float(grn)) > 0
-        except:
-            outstanding = False
-        return outstanding or (status in po_open_statuses) or (status == "open")
-
+    po_open_statuses = [s.lower() for s in cfg.get("po_open_delivery_statuses", [])]
     if not pos.empty:
-        pos["Is_Open_Delivery_PO"] = pos.apply(is_po_open_delivery, axis=1)
+        if "PO_Quantity" in pos.columns and "GRN_Quantity" in pos.columns:
+            qty = pd.to_numeric(pos["PO_Quantity"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            grn = pd.to_numeric(pos["GRN_Quantity"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            qty = grn = np.full(len(pos), np.nan)
+        status = _status_col(pos, "Delivery_Status")
+        open_codes = _level_hits(status, po_open_statuses + ["open"])
+        pos["Is_Open_Delivery_PO"] = open_delivery_mask(qty, grn, status.cat.codes.to_numpy(), open_codes)
+
+    return prs, pos
 
-    # KPIs
+@st.cache_data(show_spinner=False)
+def build_base(file_bytes, pr_map_items, po_map_items, cfg_json):
+    """Parse + enrich an upload once per unique file content, column mappings and settings."""
+    if file_bytes is None:
+        return pd.DataFrame(), pd.DataFrame()
+    cfg = json.loads(cfg_json)
+    # Full sheets via the cached read_excel (shared with the other pages): the detail
+    # tables and exports show unmapped source columns too
+    prs_df, pos_df, _ = read_excel(file_bytes, date_format=cfg.get("date_format", "auto"))
+    return enrich_frames(prs_df, pos_df, dict(pr_map_items), dict(po_map_items), cfg)
+
+def compute_metrics(prs, pos):
+    """KPI counts for enriched (and possibly filtered) frames – cheap, so not cached."""
     total_prs = int(len(prs)) if not prs.empty else 0
     total_pos = int(len(pos)) if not pos.empty else 0
     open_prs = int(prs["Is_Open_PR"].sum()) if "Is_Open_PR" in prs.columns else 0
@@ -265,18 +335,33 @@ def compute_metrics(prs_df, pos_df, pr_map, po_map, cfg):
         "Open PRs": open_prs,
         "Open Delivery POs": open_delivery_pos
     }
+    return metrics
 
-    return metrics, prs, pos
+def filter_options(df, col):
+    """Sorted unique values for a filter multiselect ([] if the column is absent)."""
+    if col not in df.columns:
+        return []
+    # unify() stores these as category dtype, whose levels are already unique and sorted
+    if isinstance(df[col].dtype, pd.CategoricalDtype):
+        return df[col].cat.categories.tolist()
+    return sorted(df[col].dropna().unique())
 
 # -----------------------------
 # Charts
 # -----------------------------
+def _category_counts(df, name):
+    """Rows per Category via value_counts; zero-count category levels are dropped."""
+    counts = df['Category'].value_counts(dropna=False)
+    counts = counts[counts > 0]
+    return counts.rename_axis('Category').reset_index(name=name)
+
 def category_grouped_bar(prs, pos):
     # Count per category for PRs and POs
-    cat_pr = prs.groupby('Category', dropna=False).size().reset_index(name='PRs') if not prs.empty else pd.DataFrame(columns=['Category','PRs'])
-    cat_po = pos.groupby('Category', dropna=False).size().reset_index(name='POs') if not pos.empty else pd.DataFrame(columns=['Category','POs'])
-    cat = pd.merge(cat_pr, cat_po, on='Category', how='outer').fillna(0)
-    cat = cat[cat['Category'].isin(CATEGORIES)]
+    prs = prs[prs['Category'].isin(CATEGORIES)] if not prs.empty else prs
+    pos = pos[pos['Category'].isin(CATEGORIES)] if not pos.empty else pos
+    cat_pr = _category_counts(prs, 'PRs') if not prs.empty else pd.DataFrame(columns=['Category','PRs'])
+    cat_po = _category_counts(pos, 'POs') if not pos.empty else pd.DataFrame(columns=['Category','POs'])
+    cat = pd.merge(cat_pr, cat_po, on='Category', how='outer').fillna({'PRs': 0, 'POs': 0})
     cat_long = cat.melt(id_vars=['Category'], value_vars=['PRs','POs'], var_name='Type', value_name='Count')
     color_scale = alt.Scale(domain=CATEGORIES, range=[config['category_colors'][c] for c in CATEGORIES])
     chart = alt.Chart(cat_long).mark_bar().encode(
@@ -295,8 +380,8 @@ def category_donut(prs, pos, which='PRs'):
         base = pos
     if base.empty:
         return alt.Chart(pd.DataFrame({'Category':[], 'Count':[]})).mark_arc(), pd.DataFrame()
-    cat = base.groupby('Category', dropna=False).size().reset_index(name='Count')
-    cat = cat[cat['Category'].isin(CATEGORIES)]
+    base = base[base['Category'].isin(CATEGORIES)]
+    cat = _category_counts(base, 'Count')
     color_scale = alt.Scale(domain=CATEGORIES, range=[config['category_colors'][c] for c in CATEGORIES])
     chart = alt.Chart(cat).mark_arc(innerRadius=60).encode(
         theta='Count:Q',
@@ -308,9 +393,12 @@ def category_donut(prs, pos, which='PRs'):
 def monthly_trend(df, date_col, title):
     if df.empty or date_col not in df.columns:
         return alt.Chart(pd.DataFrame({'Month':[], 'Count':[]})).mark_line(), pd.DataFrame()
-    tmp = df.dropna(subset=[date_col]).copy()
-    tmp['Month'] = tmp[date_col].dt.to_period('M').astype(str)
-    trend = tmp.groupby(['Month','Category']).size().reset_index(name='Count')
+    tmp = df.dropna(subset=[date_col])
+    tmp = tmp[tmp['Category'].isin(CATEGORIES)]
+    # Aggregate on the Period first; only the aggregated Month labels are stringified for Altair
+    month = tmp[date_col].dt.to_period('M').rename('Month')
+    trend = tmp.groupby([month, 'Category'], observed=True).size().reset_index(name='Count')
+    trend['Month'] = trend['Month'].astype(str)
     color_scale = alt.Scale(domain=CATEGORIES, range=[config['category_colors'][c] for c in CATEGORIES])
     chart = alt.Chart(trend).mark_line(point=True).encode(
         x=alt.X('Month:N', sort=None),
@@ -326,7 +414,7 @@ def monthly_trend(df, date_col, title):
 if page == "Upload & Column Mapper":
     st.title("📥 Upload & Column Mapper")
     uploaded = st.file_uploader("Upload Excel (with sheets: PRs, POs, optional Category_Mapping)", type=["xlsx"])
-    prs_df, pos_df, cat_map_df = read_excel(uploaded, date_format=config.get("date_format","auto"))
+    prs_df, pos_df, cat_map_df = read_excel(uploaded.getvalue() if uploaded else None, date_format=config.get("date_format","auto"))
 
     if uploaded and cat_map_df is not None and not cat_map_df.empty:
         # Load mapping from sheet
@@ -367,10 +455,7 @@ if page == "Upload & Column Mapper":
     # Export mapping to Excel
     if st.button("⬇️ Export Mapping to Excel"):
         out = pd.DataFrame(sorted(config.get('category_mapping', {}).items()), columns=['Key_Field','Category'])
-        buf = io.BytesIO()
-        with pd.ExcelWriter(buf, engine='openpyxl') as writer:
-            out.to_excel(writer, index=False, sheet_name='Category_Mapping')
-        st.download_button("Download Category_Mapping.xlsx", data=buf.getvalue(), file_name="Category_Mapping.xlsx")
+        st.download_button("Download Category_Mapping.xlsx", data=to_xlsx_bytes(out, 'Category_Mapping'), file_name="Category_Mapping.xlsx")
 
 # -----------------------------
 # Dashboard Page
@@ -378,20 +463,24 @@ if page == "Upload & Column Mapper":
 elif page == "Dashboard":
     st.title("📈 Dashboard")
     uploaded = st.file_uploader("Upload Excel (with sheets: PRs, POs, optional Category_Mapping)", type=["xlsx"], key="dash_upload")
-    prs_df, pos_df, _ = read_excel(uploaded, date_format=config.get("date_format","auto"))
-
     pr_map = config.get("column_mapping", {}).get("PRs", {})
     po_map = config.get("column_mapping", {}).get("POs", {})
 
-    metrics, prs, pos = compute_metrics(prs_df, pos_df, pr_map, po_map, config)
+    # Enriched base frames are cached on the upload's bytes, so filter changes don't recompute them
+    prs, pos = build_base(
+        uploaded.getvalue() if uploaded else None,
+        tuple(sorted(pr_map.items())),
+        tuple(sorted(po_map.items())),
+        json.dumps(config, sort_keys=True),
+    )
 
     # Filters panel
     with st.expander("🔎 Filters", expanded=True):
         # Date range filters
-        pr_min_date = pd.to_datetime(prs['PR_Date']).min() if ('PR_Date' in prs.columns and not prs.empty) else None
-        pr_max_date = pd.to_datetime(prs['PR_Date']).max() if ('PR_Date' in prs.columns and not prs.empty) else None
-        po_min_date = pd.to_datetime(pos['PO_Date']).min() if ('PO_Date' in pos.columns and not pos.empty) else None
-        po_max_date = pd.to_datetime(pos['PO_Date']).max() if ('PO_Date' in pos.columns and not pos.empty) else None
+        pr_min_date = prs['PR_Date'].min() if ('PR_Date' in prs.columns and not prs.empty) else None
+        pr_max_date = prs['PR_Date'].max() if ('PR_Date' in prs.columns and not prs.empty) else None
+        po_min_date = pos['PO_Date'].min() if ('PO_Date' in pos.columns and not pos.empty) else None
+        po_max_date = pos['PO_Date'].max() if ('PO_Date' in pos.columns and not pos.empty) else None
 
         colA, colB = st.columns(2)
         with colA:
@@ -400,46 +489,52 @@ elif page == "Dashboard":
             po_date_rng = st.date_input("PO Date Range", value=(po_min_date, po_max_date) if po_min_date and po_max_date else None)
 
         categories_filter = st.multiselect("Category", CATEGORIES, default=CATEGORIES)
-        vendor_filter = st.multiselect("Vendor (if present)", sorted(pos['Vendor'].dropna().unique()) if 'Vendor' in pos.columns else [])
-        buyer_filter = st.multiselect("Buyer (if present)", sorted(prs['Buyer'].dropna().unique()) if 'Buyer' in prs.columns else [])
-        status_filter_pr = st.multiselect("PR Status", sorted(prs['PR_Status'].dropna().unique()) if 'PR_Status' in prs.columns else [])
-        status_filter_po = st.multiselect("PO Status", sorted(pos['PO_Status'].dropna().unique()) if 'PO_Status' in pos.columns else [])
+        vendor_filter = st.multiselect("Vendor (if present)", filter_options(pos, 'Vendor'))
+        buyer_filter = st.multiselect("Buyer (if present)", filter_options(prs, 'Buyer'))
+        status_filter_pr = st.multiselect("PR Status", filter_options(prs, 'PR_Status'))
+        status_filter_po = st.multiselect("PO Status", filter_options(pos, 'PO_Status'))
 
-    # Apply filters
+    # Apply filters: AND all conditions into one mask per frame, then slice once
     def within_date(df, col, rng):
         if df.empty or col not in df.columns or not rng or len(rng) != 2:
-            return df
+            return True
         start, end = pd.to_datetime(rng[0]), pd.to_datetime(rng[1])
-        return df[(df[col] >= start) & (df[col] <= end)]
+        return df[col].between(start, end)
 
-    prs_f = within_date(prs, 'PR_Date', pr_date_rng)
-    pos_f = within_date(pos, 'PO_Date', po_date_rng)
+    m_pr = pd.Series(True, index=prs.index)
+    m_po = pd.Series(True, index=pos.index)
+    m_pr &= within_date(prs, 'PR_Date', pr_date_rng)
+    m_po &= within_date(pos, 'PO_Date', po_date_rng)
     if categories_filter:
-        prs_f = prs_f[prs_f['Category'].isin(categories_filter)] if 'Category' in prs_f.columns else prs_f
-        pos_f = pos_f[pos_f['Category'].isin(categories_filter)] if 'Category' in pos_f.columns else pos_f
-    if vendor_filter and 'Vendor' in pos_f.columns:
-        pos_f = pos_f[pos_f['Vendor'].isin(vendor_filter)]
-    if buyer_filter and 'Buyer' in prs_f.columns:
-        prs_f = prs_f[prs_f['Buyer'].isin(buyer_filter)]
-    if status_filter_pr and 'PR_Status' in prs_f.columns:
-        prs_f = prs_f[prs_f['PR_Status'].isin(status_filter_pr)]
-    if status_filter_po and 'PO_Status' in pos_f.columns:
-        pos_f = pos_f[pos_f['PO_Status'].isin(status_filter_po)]
+        if 'Category' in prs.columns:
+            m_pr &= prs['Category'].isin(categories_filter)
+        if 'Category' in pos.columns:
+            m_po &= pos['Category'].isin(categories_filter)
+    if vendor_filter and 'Vendor' in pos.columns:
+        m_po &= pos['Vendor'].isin(vendor_filter)
+    if buyer_filter and 'Buyer' in prs.columns:
+        m_pr &= prs['Buyer'].isin(buyer_filter)
+    if status_filter_pr and 'PR_Status' in prs.columns:
+        m_pr &= prs['PR_Status'].isin(status_filter_pr)
+    if status_filter_po and 'PO_Status' in pos.columns:
+        m_po &= pos['PO_Status'].isin(status_filter_po)
+    prs_f = prs.loc[m_pr]
+    pos_f = pos.loc[m_po]
 
     # Recompute metrics after filters
-    metrics_f, _, _ = compute_metrics(prs_f, pos_f, pr_map, po_map, config)
+    metrics_f = compute_metrics(prs_f, pos_f)
 
     # Big KPI tiles (updated per your request: "total values big size & category value")
     st.markdown("### Key KPIs")
     k1, k2, k3, k4 = st.columns(4)
     with k1:
-        big_number_card("Total PRs", metrics_f.get("Total PRs",0), color="#2F80ED", icon="📄")
+        st.metric("📄 Total PRs", f"{metrics_f.get('Total PRs', 0):,}")
     with k2:
-        big_number_card("Total POs", metrics_f.get("Total POs",0), color="#20B2AA", icon="🧾")
+        st.metric("🧾 Total POs", f"{metrics_f.get('Total POs', 0):,}")
     with k3:
-        big_number_card("Open PRs", metrics_f.get("Open PRs",0), color="#F2994A", icon="⏳")
+        st.metric("⏳ Open PRs", f"{metrics_f.get('Open PRs', 0):,}")
     with k4:
-        big_number_card("Open Delivery POs", metrics_f.get("Open Delivery POs",0), color="#8E44AD", icon="🚚")
+        st.metric("🚚 Open Delivery POs", f"{metrics_f.get('Open Delivery POs', 0):,}")
 
     st.markdown("### Category Snapshot (Counts)")
     # Category cards showing PR & PO counts per category
@@ -451,7 +546,7 @@ elif page == "Dashboard":
             row = cat_counts[cat_counts['Category']==cat]
             pr_c = int(row['PRs'].iloc[0]) if not row.empty else 0
             po_c = int(row['POs'].iloc[0]) if not row.empty else 0
-            big_number_card(f"{cat}", f"PRs: {pr_c} | POs: {po_c}", color=config['category_colors'][cat])
+            st.metric(cat, f"{pr_c:,}", delta=f"POs: {po_c:,}", delta_color="off", help="PRs (value) and POs (delta) in this category")
 
     st.markdown("### Category-wise Grouped Bars")
     st.altair_chart(cat_bar, use_container_width=True)
@@ -475,18 +570,16 @@ elif page == "Dashboard":
     st.markdown("### Detailed Tables")
     tab1, tab2 = st.tabs(["PRs", "POs"])
     with tab1:
-        st.dataframe(prs_f, use_container_width=True)
+        prs_f = prs_f.drop(columns=HELPER_COLS, errors='ignore')
+        st.dataframe(prs_f.head(TABLE_PAGE_ROWS), use_container_width=True)
+        st.caption(f"Showing {min(TABLE_PAGE_ROWS, len(prs_f)):,} of {len(prs_f):,} rows — use Export for full data.")
         # Export filtered PRs
-        buf_pr = io.BytesIO()
-        with pd.ExcelWriter(buf_pr, engine='openpyxl') as writer:
-            prs_f.to_excel(writer, index=False, sheet_name='PRs')
-        st.download_button("⬇️ Export PRs (filtered)", buf_pr.getvalue(), file_name="PRs_filtered.xlsx")
+        st.download_button("⬇️ Export PRs (filtered)", data=to_xlsx_bytes(prs_f, 'PRs'), file_name="PRs_filtered.xlsx")
     with tab2:
-        st.dataframe(pos_f, use_container_width=True)
-        buf_po = io.BytesIO()
-        with pd.ExcelWriter(buf_po, engine='openpyxl') as writer:
-            pos_f.to_excel(writer, index=False, sheet_name='POs')
-        st.download_button("⬇️ Export POs (filtered)", buf_po.getvalue(), file_name="POs_filtered.xlsx")
+        pos_f = pos_f.drop(columns=HELPER_COLS, errors='ignore')
+        st.dataframe(pos_f.head(TABLE_PAGE_ROWS), use_container_width=True)
+        st.caption(f"Showing {min(TABLE_PAGE_ROWS, len(pos_f)):,} of {len(pos_f):,} rows — use Export for full data.")
+        st.download_button("⬇️ Export POs (filtered)", data=to_xlsx_bytes(pos_f, 'POs'), file_name="POs_filtered.xlsx")
 
     st.caption("Tip: Use the Filters to focus on specific Categories like MRO/Services/Capex/PCM.")
 
@@ -497,7 +590,7 @@ else:
     if page == "Data Health":
         st.title("🩺 Data Health")
         uploaded = st.file_uploader("Upload Excel to inspect", type=["xlsx"], key="health_upload")
-        prs_df, pos_df, cat_map_df = read_excel(uploaded, date_format=config.get("date_format","auto"))
+        prs_df, pos_df, cat_map_df = read_excel(uploaded.getvalue() if uploaded else None, date_format=config.get("date_format","auto"))
         pr_map = config.get("column_mapping", {}).get("PRs", {})
         po_map = config.get("column_mapping", {}).get("POs", {})
 